@@ -0,0 +1,90 @@
+import argparse, collections, concurrent.futures, csv, os, typing, giiker
+
+SOLVED_STATES = { str(e.solved) for e in giiker.ENGINES.values() }
+MOVE_NAMES = [str(m) for m in giiker.Move]
+
+class SolveStats(typing.NamedTuple):
+    file: str
+    solve: int
+    first_line: int
+    last_line: int
+    num_moves: int
+    num_states: int
+    move_counts: typing.Mapping[str, int]
+
+    def to_row(self) -> typing.List: return [self.file, self.solve, self.first_line, self.last_line, self.num_moves, self.num_states] + [self.move_counts.get(m, 0) for m in MOVE_NAMES]
+
+CSV_HEADER = ["file", "solve", "first_line", "last_line", "num_moves", "num_states"] + MOVE_NAMES
+
+def parse_move_line(line: str) -> typing.Optional[typing.Tuple[str, str]]:
+    #Lines are of the form 'MOVE | <facelet string> | <move>' (see the 'moves' command of demo.py)
+    idx = line.find("MOVE | ")
+    if idx < 0: return None
+
+    parts = line[idx:].rstrip().split(" | ")
+    if len(parts) != 3 or parts[2] not in MOVE_NAMES: return None
+    return parts[1], parts[2]
+
+def analyze_log(path: str, count_states: bool = False) -> typing.Tuple[typing.List[SolveStats], typing.Counter[str]]:
+    solves: typing.List[SolveStats] = []
+    state_freqs: typing.Counter[str] = collections.Counter()
+
+    #Moves are only attributed to a solve once the cube was seen in the solved state
+    seen_solved = False
+    first_line, moves, states = None, collections.Counter(), set()
+
+    with open(path, "r", errors="replace") as f:
+        for line_no, line in enumerate(f, 1):
+            entry = parse_move_line(line)
+            if not entry: continue
+            st, move = entry
+
+            if st in SOLVED_STATES:
+                #Emit the solve which just ended
+                if first_line is not None:
+                    moves[move] += 1
+                    solves.append(SolveStats(path, len(solves), first_line, line_no, sum(moves.values()), len(states) + 1, moves))
+                    if count_states: state_freqs[st] += 1
+
+                seen_solved = True
+                first_line, moves, states = None, collections.Counter(), set()
+            elif seen_solved:
+                if first_line is None: first_line = line_no
+                moves[move] += 1
+                states.add(st)
+                if count_states: state_freqs[st] += 1
+
+    return solves, state_freqs
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyzes move logs recorded using the 'moves' command of demo.py")
+    parser.add_argument("logs", nargs="+", help="Move log files to analyze")
+    parser.add_argument("-o", "--output", default="solves.csv", help="CSV file to write per-solve statistics to")
+    parser.add_argument("-s", "--states", default=None, help="CSV file to write state frequencies to (keeps all distinct states in memory)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="Number of worker processes")
+    args = parser.parse_args()
+
+    state_freqs: typing.Counter[str] = collections.Counter()
+    num_solves = 0
+
+    #Analyze the logs in a process pool, writing out results as they come in
+    with open(args.output, "w", newline="") as f, concurrent.futures.ProcessPoolExecutor(args.jobs) as executor:
+        writer = csv.writer(f)
+        writer.writerow(CSV_HEADER)
+
+        futs = [executor.submit(analyze_log, path, args.states is not None) for path in args.logs]
+        for fut in concurrent.futures.as_completed(futs):
+            solves, freqs = fut.result()
+            writer.writerows(s.to_row() for s in solves)
+            state_freqs.update(freqs)
+            num_solves += len(solves)
+
+    if args.states:
+        with open(args.states, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["state", "count"])
+            writer.writerows(state_freqs.most_common())
+
+    print(f"Analyzed {len(args.logs)} logs: {num_solves} solves")
+
+if __name__ == '__main__': main()
@@ -1,59 +1,67 @@
-import asyncio, aioconsole, logging, giiker, argparse, time
+import asyncio, aioconsole, logging, giiker, argparse
 from view import CubeView
 
 logging.basicConfig(level=logging.INFO)
 
 parser = argparse.ArgumentParser()
 parser.add_argument("-d", "--debug", action="store_true", help="Enable debug logging")
+parser.add_argument("-i", "--inspection", action="store_true", help="Enable 15 second WCA inspection for the solve timer")
+parser.add_argument("-a", "--algs", default=None, help="Algorithm library to recognize algorithms from (lines of the form '<name>: <moves>')")
+parser.add_argument("-c", "--cube-clock", action="store_true", help="Time solves using the cube clock (synced when connecting) instead of the host clock")
+parser.add_argument("-s", "--solves", default="solves.db", help="SQLite database to store solves in (empty to disable)")
 args = parser.parse_args()
 
 if args.debug: giiker.LOGGER.setLevel(logging.DEBUG)
 
-async def solve_timer(cube: giiker.CubeDevice):
+async def solve_timer(cube: giiker.CubeDevice, timer: giiker.SolveTimer):
     #Wait  for the cube to be scrambled
     while True:
         await aioconsole.ainput("Scramble the cube, then press enter")
         if not cube.move_handler.cur_state.is_solved: break
 
-    #Start the timer
-    start_time: float = None
-    solved_time: float = None
+    #Arm the timer
+    solve: giiker.Solve = None
+    solve_evt = asyncio.Event()
+    def solve_cb(s: giiker.Solve):
+        nonlocal solve
+        solve = s
+        solve_evt.set()
 
-    start_evt, solve_evt = asyncio.Event(), asyncio.Event()
-    def move_cb(state: giiker.CubeState, move: giiker.Move):
-        nonlocal start_time, solved_time
-
-        #Handle start condition
-        if not start_time:
-            start_time = time.time()
-            start_evt.set()
-
-        #Handle solve condition
-        if state.is_solved:
-            solved_time = time.time()
-            solve_evt.set()
-
-    await cube.move_handler.register_handler(move_cb)
+    timer.register_handler(solve_cb)
     try:
-        #Wait for a move to be made
-        print("Timer starts once a move is made", end=" "*10 + "\r")
-        await start_evt.wait()
+        timer.arm()
+        if timer.inspection: print("Inspection started, timer starts once a move is made")
+        else: print("Timer starts once a move is made")
 
         #Wait for the cube to be solved
-        print("Waiting for the cube to be solved..." + " "*10)
         while not solve_evt.is_set():
             #Print the current time
-            t = time.time() - start_time
-            print(f"Current time: {int(t / 60)}m {int(t % 60):02d}s {int((t * 1000) % 1000):03d}ms", end=" "*10 + "\r")
+            if timer.state == giiker.SolveTimer.State.INSPECTING: print(f"Inspection: {giiker.format_time(timer.elapsed)}", end=" "*10 + "\r")
+            elif timer.state == giiker.SolveTimer.State.RUNNING: print(f"Current time: {giiker.format_time(timer.elapsed)}", end=" "*10 + "\r")
 
             await asyncio.sleep(0.053)
-    finally: await cube.move_handler.unregister_handler(move_cb)
+    finally:
+        timer.unregister_handler(solve_cb)
+        timer.cancel()
 
-    #Output final time
-    t = solved_time - start_time
-    print(f"Solve time: {int(t / 60)}m {int(t % 60):02d}s {int((t * 1000) % 1000):03d}ms" + " "*10)
+    #Output final time and statistics
+    print(f"Solve time: {solve}" + " "*10)
+    if timer.store:
+        stats = timer.store.stats(timer.cube_uid, timer.session)
+        print(f"Session: {stats.count} solves, best {giiker.format_time(stats.best)}")
+        for size, avg in stats.averages.items():
+            print(f"    ao{size}: {giiker.format_time(avg.value)} (best {giiker.format_time(avg.best)})")
 
 async def command_loop(cube: giiker.CubeDevice):
+    #Set up the solve timer
+    store = giiker.SolveStore(args.solves) if args.solves else None
+    timer = giiker.SolveTimer(cube.move_handler, args.inspection, store, (await cube.query_uid()).hex(), use_cube_clock=args.cube_clock)
+    await timer.attach()
+
+    #Set up algorithm recognition
+    matcher = giiker.AlgorithmMatcher(giiker.AlgorithmLibrary.load(args.algs), cube.move_handler) if args.algs else None
+    if matcher: await matcher.attach()
+
     #Main command loop
     view : CubeView = None
     try:
@@ -67,6 +75,7 @@ async def command_loop(cube: giiker.CubeDevice):
                 print("(v)iew:  Opens a 3D view of the cube which updates in real time")
                 print("(t)imer: Starts a timer for measuring the time it takes to solve the cube")
                 print("(d)ebug: Toggles debug logging")
+                print("(f)light: Dumps the most recent packets sent/received")
             elif cmd == "q" or cmd == "quit":
                 print("Exiting...")
                 break
@@ -80,22 +89,28 @@ async def command_loop(cube: giiker.CubeDevice):
                 print(f"battery:    {await cube.query_battery()}")
                 print(f"#moves:     {await cube.query_num_moves()}")
             elif cmd == "m" or cmd == "moves":
-                def move_cb(state: giiker.CubeState, move: giiker.Move):
+                def move_cb(state: giiker.PieceState, move: giiker.Move):
                     print(f"MOVE | {state} | {move}")
 
+                def alg_cb(alg: giiker.Algorithm):
+                    print(f"ALG  | {alg}")
+
                 await cube.move_handler.register_handler(move_cb)
+                if matcher: matcher.register_handler(alg_cb)
                 await aioconsole.ainput("Press ENTER to stop\n")
+                if matcher: matcher.unregister_handler(alg_cb)
                 await cube.move_handler.unregister_handler(move_cb)
             elif cmd == "v" or cmd == "view":
-                if not view or view.has_exit:
-                    def view_move_cb(state: giiker.CubeState, move: giiker.Move):
-                        if view: view.cube.update_state(state, move)
+                if cube.cube_type != 3: print("The 3D view only supports 3x3 cubes at the moment")
+                elif not view or view.has_exit:
+                    def view_move_cb(state: giiker.PieceState, move: giiker.Move):
+                        if view: view.cube.update_state(state.to_cube_state(), move)
                     await cube.move_handler.register_handler(view_move_cb)
 
                     view, _ = await CubeView.run_thread(lambda: asyncio.ensure_future(cube.move_handler.unregister_handler(view_move_cb)))
-                    view.cube.update_state(cube.move_handler.cur_state, None)
+                    view.cube.update_state(cube.move_handler.cur_state.to_cube_state(), None)
             elif cmd == "t" or cmd == "timer":
-                await solve_timer(cube)
+                await solve_timer(cube, timer)
             elif cmd == "d" or cmd == "debug":
                 if giiker.LOGGER.level != logging.DEBUG:
                     giiker.LOGGER.setLevel(logging.DEBUG)
@@ -103,9 +118,14 @@ async def command_loop(cube: giiker.CubeDevice):
                 else:
                     giiker.LOGGER.setLevel(logging.INFO)
                     print("Disabled debug logging")
+            elif cmd == "f" or cmd == "flight":
+                print(cube.flight_recorder.dump())
             else: print("Unknown command")
     finally:
         if view: view.close_threadsafe()
+        await timer.detach()
+        if matcher: await matcher.detach()
+        if store: store.close()
 
 async def main():
     #Scan for a cube
@@ -126,10 +146,7 @@ async def main():
         print(f"    UID:        {(await cube.query_uid()).hex()}")
         print(f"    battery:    {await cube.query_battery()}")
         print(f"    #moves:     {await cube.query_num_moves()}")
-
-        if cube.cube_type != 3:
-            print("Non-3x3 cubes are not supported at the moment")
-            return
+        if cube.clock_sync.is_synced: print(f"    clock:      offset {cube.clock_sync.offset:.3f}ms drift {cube.clock_sync.drift:.9f}")
 
         await command_loop(cube)
     finally:
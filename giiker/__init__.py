@@ -1,7 +1,18 @@
 from .log import *
+from .flight_recorder import *
 from .cube import *
 from .cmd import *
 from .state import *
+from .engine import *
+from .batch import *
 from .rw_handler import *
+from .clock import *
 from .move_handler import *
-from .scan import *
\ No newline at end of file
+from .stats import *
+from .store import *
+from .timer import *
+from .shm import *
+from .algs import *
+from .transform import *
+from .scan import *
+from .fleet import *
\ No newline at end of file
@@ -0,0 +1,136 @@
+import logging, typing, dataclasses, collections
+from . import log, state, move_handler, engine
+
+FACES = list(state.Face)
+NUM_TOKENS = len(FACES) * 3
+
+_FACE_INDICES = { f: i for i, f in enumerate(FACES) }
+
+def move_turns(move: move_handler.Move) -> int: return 2 if move.is_double_rot else 3 if move.is_ccw else 1
+
+def normalize_moves(moves: typing.Iterable[move_handler.Move]) -> typing.List[typing.Tuple[state.Face, int]]:
+    #Merge consecutive turns of the same face into a single number of clockwise quarter turns, dropping cancelled turns
+    turns = []
+    for m in moves:
+        t = move_turns(m)
+        if turns and turns[-1][0] == m.face:
+            t = (turns.pop()[1] + t) % 4
+            if t == 0: continue
+        turns.append((m.face, t))
+    return turns
+
+def _token(face: state.Face, turns: int) -> int: return _FACE_INDICES[face] * 3 + turns - 1
+
+@dataclasses.dataclass(frozen=True)
+class Algorithm:
+    name: str
+    moves: typing.Tuple[move_handler.Move, ...]
+
+    def __str__(self): return f"{self.name}: {' '.join(str(m) for m in self.moves)}"
+
+class AlgorithmLibrary:
+    algorithms: typing.List[Algorithm]
+
+    _trans: typing.List[int]                    #Aho-Corasick automaton transitions, indexed by state * NUM_TOKENS + token
+    _outputs: typing.List[typing.Tuple[Algorithm, ...]]
+
+    def __init__(self, algorithms: typing.Iterable[Algorithm]):
+        self.algorithms = list(algorithms)
+
+        #Build the trie of normalized move sequences
+        goto: typing.List[typing.Dict[int, int]] = [{}]
+        outputs: typing.List[typing.List[Algorithm]] = [[]]
+        for alg in self.algorithms:
+            toks = [_token(f, t) for f, t in normalize_moves(alg.moves)]
+            if not toks: raise ValueError(f"Algorithm '{alg.name}' cancels out completely")
+
+            s = 0
+            for tok in toks:
+                if tok not in goto[s]:
+                    goto[s][tok] = len(goto)
+                    goto.append({})
+                    outputs.append([])
+                s = goto[s][tok]
+            outputs[s].append(alg)
+
+        #Turn it into a complete automaton by following failure links in BFS order
+        self._trans = [0] * (len(goto) * NUM_TOKENS)
+        fail = [0] * len(goto)
+        queue = collections.deque()
+        for tok in range(NUM_TOKENS):
+            if tok in goto[0]:
+                self._trans[tok] = goto[0][tok]
+                queue.append(goto[0][tok])
+
+        while queue:
+            s = queue.popleft()
+            outputs[s] += outputs[fail[s]]
+            for tok in range(NUM_TOKENS):
+                if tok in goto[s]:
+                    ns = goto[s][tok]
+                    fail[ns] = self._trans[fail[s] * NUM_TOKENS + tok]
+                    self._trans[s * NUM_TOKENS + tok] = ns
+                    queue.append(ns)
+                else: self._trans[s * NUM_TOKENS + tok] = self._trans[fail[s] * NUM_TOKENS + tok]
+
+        self._outputs = [tuple(o) for o in outputs]
+
+    @staticmethod
+    def load(path: str) -> "AlgorithmLibrary":
+        #Each non-empty line is of the form '<name>: <moves>', lines starting with '#' are comments
+        algs = []
+        with open(path, "r") as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith("#"): continue
+
+                name, sep, moves = line.rpartition(":")
+                if not sep: raise ValueError(f"{path}:{line_no}: Expected '<name>: <moves>'")
+                algs.append(Algorithm(name.strip(), tuple(move_handler.parse_moves(moves))))
+
+        log.trace(lambda: f"Loaded {len(algs)} algorithms from {path}", logging.INFO)
+        return AlgorithmLibrary(algs)
+
+class AlgorithmMatcher:
+    MAX_UNDO = 64
+
+    library: AlgorithmLibrary
+    move_handler: typing.Optional[move_handler.MoveHandler]
+
+    _state: int
+    _turns: typing.Deque[typing.Tuple[state.Face, int, int]]
+    _handlers: typing.List[typing.Callable[[Algorithm], None]]
+
+    def __init__(self, library: AlgorithmLibrary, move_handler: typing.Optional[move_handler.MoveHandler] = None):
+        self.library = library
+        self.move_handler = move_handler
+        self._handlers = []
+        self.reset()
+
+    async def attach(self): await self.move_handler.register_handler(self._move_cb)
+    async def detach(self): await self.move_handler.unregister_handler(self._move_cb)
+
+    def register_handler(self, cb: typing.Callable[[Algorithm], None]): self._handlers.append(cb)
+    def unregister_handler(self, cb: typing.Callable[[Algorithm], None]): self._handlers.remove(cb)
+
+    def reset(self):
+        self._state = 0
+        self._turns = collections.deque(maxlen=AlgorithmMatcher.MAX_UNDO)
+
+    def feed(self, move: move_handler.Move) -> typing.Tuple[Algorithm, ...]:
+        face, turns = move.face, move_turns(move)
+
+        #Merge with the previous turn of the same face, rewinding the automaton to before it
+        if self._turns and self._turns[-1][0] == face:
+            _, prev_turns, self._state = self._turns.pop()
+            turns = (prev_turns + turns) % 4
+            if turns == 0: return ()
+
+        self._turns.append((face, turns, self._state))
+        self._state = self.library._trans[self._state * NUM_TOKENS + _token(face, turns)]
+        return self.library._outputs[self._state]
+
+    def _move_cb(self, st: engine.PieceState, move: move_handler.Move):
+        for alg in self.feed(move):
+            log.trace(lambda: f"[{self.move_handler.cube}] algorithm | {alg}")
+            for h in self._handlers: h(alg)
@@ -0,0 +1,68 @@
+import typing, dataclasses
+import numpy as np
+from . import state
+
+#Corner positions whose encoded rotation runs in the opposite direction (see CubeState.decode_state)
+_CORNER_ORI_SIGN = np.array([-1, 1, -1, 1, 1, -1, 1, -1], dtype=np.int8)
+
+def _parity(perm: np.ndarray) -> np.ndarray:
+    #Parity of each row's permutation, from its number of inversions
+    return np.triu(perm[:, :, None] > perm[:, None, :]).sum(axis=(1, 2)) % 2
+
+@dataclasses.dataclass
+class StateBatch:
+    #Piece arrays are only meaningful for rows where is_valid is set
+    raw: np.ndarray
+
+    corner_perm: np.ndarray     #(N, 8) home index of the cubelet at each corner position [0;7]
+    corner_ori: np.ndarray      #(N, 8) twist of the cubelet at each corner position [0;2], 0 if solved
+    edge_perm: np.ndarray       #(N, 12) home index of the cubelet at each edge position [0;11]
+    edge_ori: np.ndarray        #(N, 12) flip of the cubelet at each edge position [0;1], 0 if solved
+
+    @property
+    def is_solved(self) -> np.ndarray:
+        return (
+            np.all(self.corner_perm == np.arange(8, dtype=np.uint8), axis=1) &
+            np.all(self.edge_perm == np.arange(12, dtype=np.uint8), axis=1) &
+            ~np.any(self.corner_ori, axis=1) &
+            ~np.any(self.edge_ori, axis=1)
+        )
+
+    @property
+    def is_valid(self) -> np.ndarray:
+        #Same checks as CubeState.is_valid_state, for all states at once (invalid indices wrap around, failing the permutation checks)
+        twist_nibbles = np.stack([self.raw[:, 4:8] >> 4, self.raw[:, 4:8] & 0xf], axis=2).reshape(-1, 8)
+        return (
+            ((self.raw[:, 15] & 0xf) == 0) &
+            np.all(np.sort(self.corner_perm, axis=1) == np.arange(8, dtype=np.uint8), axis=1) &
+            np.all((twist_nibbles >= 1) & (twist_nibbles <= 3), axis=1) &
+            (self.corner_ori.sum(axis=1) % 3 == 0) &
+            np.all(np.sort(self.edge_perm, axis=1) == np.arange(12, dtype=np.uint8), axis=1) &
+            (self.edge_ori.sum(axis=1) % 2 == 0) &
+            (_parity(self.corner_perm) == _parity(self.edge_perm))
+        )
+
+    def state(self, idx: int) -> state.CubeState: return state.CubeState.decode_state(self.raw[idx].tobytes())
+
+    def __len__(self): return self.raw.shape[0]
+
+def decode_states_batch(bts: typing.Union[np.ndarray, bytes]) -> StateBatch:
+    raw = np.frombuffer(bts, dtype=np.uint8).reshape(-1, 16) if isinstance(bts, (bytes, bytearray, memoryview)) else np.asarray(bts, dtype=np.uint8)
+    assert raw.ndim == 2 and raw.shape[1] == 16
+
+    #Split all bytes into nibbles in one pass
+    nibbles = np.empty((raw.shape[0], 32), dtype=np.uint8)
+    nibbles[:, 0::2] = raw >> 4
+    nibbles[:, 1::2] = raw & 0xf
+
+    #nibbles 0-7 / 16-27: 1-based cubelet indices
+    corner_perm = nibbles[:, 0:8] - 1
+    edge_perm = nibbles[:, 16:28] - 1
+
+    #nibbles 8-15: rotations [1;3], with 3 being unrotated
+    corner_ori = ((nibbles[:, 8:16] % 3).astype(np.int8) * _CORNER_ORI_SIGN % 3).astype(np.uint8)
+
+    #nibbles 28-30: one flip bit per edge
+    edge_ori = np.unpackbits(raw[:, 14:16], axis=1)[:, 0:12]
+
+    return StateBatch(raw, corner_perm, corner_ori, edge_perm, edge_ori)
@@ -0,0 +1,61 @@
+import asyncio, logging, typing, time, collections
+from . import log
+
+class ClockSync:
+    #Maps host perf_counter_ns timestamps onto the cube's own clock (CMD_GET_CLOCK). Move notifications carry no
+    #cube timestamp, so mapped move times are still only as accurate as the arrival time of their notification.
+    cube: 'CubeDevice'
+
+    offset: float   #cube clock [ms] at host time 0
+    drift: float    #cube clock [ms] per host clock [ms]
+    rtt: int        #round trip time of the latest sync [ns]
+
+    _points: typing.Deque[typing.Tuple[float, int]]
+
+    def __init__(self, cube: 'CubeDevice', max_points: int = 16):
+        self.cube = cube
+        self.offset, self.drift, self.rtt = None, 1.0, None
+        self._points = collections.deque(maxlen=max_points)
+
+    @property
+    def is_synced(self) -> bool: return self.offset != None
+
+    async def sync(self, num_samples: int = 8, timeout: float = 1.0):
+        #Sample the cube clock, keeping the sample with the smallest round trip time
+        #A query which isn't answered in time raises asyncio.TimeoutError (RWHandler skips the cancelled request's response)
+        best = None
+        for _ in range(num_samples):
+            t0 = time.perf_counter_ns()
+            cube_time = await asyncio.wait_for(self.cube.query_clock(), timeout)
+            t1 = time.perf_counter_ns()
+            if not best or t1 - t0 < best[1] - best[0]: best = (t0, t1, cube_time)
+
+        #Assume the cube sampled its clock halfway through the round trip
+        t0, t1, cube_time = best
+        self.rtt = t1 - t0
+        self._points.append(((t0 + t1) / 2 / 1e6, cube_time))
+
+        #Estimate offset and drift using a least squares fit over all sync points
+        n = len(self._points)
+        mean_host = sum(h for h, _ in self._points) / n
+        mean_cube = sum(c for _, c in self._points) / n
+        var = sum((h - mean_host)**2 for h, _ in self._points)
+        if var > 0: self.drift = sum((h - mean_host) * (c - mean_cube) for h, c in self._points) / var
+        self.offset = mean_cube - self.drift * mean_host
+
+        log.trace(lambda: f"[{self.cube}] clock sync: offset {self.offset:.3f}ms drift {self.drift:.9f} rtt {self.rtt / 1e6:.3f}ms")
+
+    async def run(self, interval: float = 30, num_samples: int = 8, timeout: float = 1.0):
+        #Periodically resync after the initial sync, which refines the drift estimate over time
+        while True:
+            await asyncio.sleep(interval)
+            try: await self.sync(num_samples, timeout)
+            except Exception as e: log.trace(lambda: f"[{self.cube}] clock sync failed: {e!r}", logging.WARNING)
+
+    def host_to_cube(self, host_time: int) -> float:
+        assert self.is_synced
+        return self.offset + self.drift * host_time / 1e6
+
+    def cube_to_host(self, cube_time: float) -> int:
+        assert self.is_synced
+        return int((cube_time - self.offset) / self.drift * 1e6)
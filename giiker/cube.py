@@ -1,5 +1,5 @@
 import asyncio, logging, typing, bleak, uuid, enum, dataclasses, struct
-from . import log, cmd, rw_handler, move_handler
+from . import log, cmd, rw_handler, move_handler, clock, flight_recorder, engine
 
 @dataclasses.dataclass
 class BatteryInfo:
@@ -14,26 +14,33 @@ class BatteryInfo:
     def __str__(self): return f"{self.level}% {self.charge_state.name}"
 
 class CubeDevice:
-    BLE_NAME_PREFIXES = ["Gi", "Hi-G-12DRL" "Hi-G-123XE"]
+    BLE_NAME_PREFIXES = ["Gi", "Hi-G-12DRL", "Hi-G-123XE"]
 
     ble_device: bleak.BLEDevice
     ble_client: bleak.BleakClient
 
     rw_handler: rw_handler.RWHandler
     move_handler: move_handler.MoveHandler
+    clock_sync: clock.ClockSync
+    _clock_sync_task: typing.Optional[asyncio.Task]
+    flight_recorder: flight_recorder.FlightRecorder
 
     fw_ver: int
     data_ver: int
     cube_type: int
     color_type: int
+    state_engine: typing.Optional[engine.StateEngine]
 
     def __init__(self, dev: bleak.BLEDevice, ad_data: bleak.AdvertisementData):
         self.ble_device = dev
         self.ble_client = None
 
         #Create handlers
+        self.flight_recorder = flight_recorder.FlightRecorder()
         self.rw_handler = rw_handler.RWHandler(self)
         self.move_handler = move_handler.MoveHandler(self)
+        self.clock_sync = clock.ClockSync(self)
+        self._clock_sync_task = None
 
         #Parse the advertisement data
         self.fw_ver = 0
@@ -55,6 +62,9 @@ class CubeDevice:
             self.cube_type = 2
             self.color_type = 1
 
+        #Select the state engine for the cube type
+        self.state_engine = engine.ENGINES.get(self.cube_type)
+
     async def connect(self):
         if self.ble_client != None: return
 
@@ -66,10 +76,17 @@ class CubeDevice:
         await self.rw_handler.connect()
         await self.move_handler.connect()
 
+        #Sync with the cube clock, and keep it synced in the background (cubes which don't answer in time stay unsynced)
+        try:
+            await self.clock_sync.sync()
+            self._clock_sync_task = asyncio.ensure_future(self.clock_sync.run())
+        except Exception as e: log.trace(lambda: f"[{self}] clock sync failed, cube clock unavailable: {e!r}", logging.WARNING)
+
         log.LOGGER.log(logging.INFO, f"Connected to GiiKER cube {self}")
 
     async def disconnect(self):
         if self.ble_client == None: return
+        self._stop_clock_sync()
 
         #Disconnect the client
         await self.ble_client.disconnect()
@@ -77,17 +94,27 @@ class CubeDevice:
     def _on_disconnect(self, client):
         if not self.ble_client: return
         self.ble_client = None
+        self._stop_clock_sync()
 
         log.LOGGER.log(logging.INFO, f"Disconnected from GiiKER cube {self}")
 
+    def _stop_clock_sync(self):
+        if self._clock_sync_task: self._clock_sync_task.cancel()
+        self._clock_sync_task = None
+
+    async def reset(self, with_color: bool = False) -> bytes:
+        resp = await self.rw_handler.send_rw_command(bytes([cmd.CMD_RESET_WITH_COLOR if with_color else cmd.CMD_RESET]))
+        log.trace(lambda: f"[{self}] reset{' with color' if with_color else ''}: {resp.hex()}")
+        return resp
+
     async def query_uid(self) -> bytes:
         uid = (await self.rw_handler.send_rw_command(bytes([cmd.CMD_GET_UID])))[1:7]
-        log.LOGGER.log(logging.DEBUG, f"[{self}] UID: {uid.hex()}")
+        log.trace(lambda: f"[{self}] UID: {uid.hex()}")
         return uid
 
     async def query_sw_ver(self) -> int:
         sw_ver = (await self.rw_handler.send_rw_command(bytes([cmd.CMD_GET_SOFTWARE_VERSION])))[1]
-        log.LOGGER.log(logging.DEBUG, f"[{self}] SW ver: {sw_ver:02x}")
+        log.trace(lambda: f"[{self}] SW ver: {sw_ver:02x}")
         return sw_ver
 
     async def query_battery(self) -> BatteryInfo:
@@ -100,12 +127,17 @@ class CubeDevice:
         elif charge_state == BatteryInfo.ChargeState.FULLY_CHARGED: level = 100
 
         info = BatteryInfo(level, charge_state)
-        log.LOGGER.log(logging.DEBUG, f"[{self}] battery: {info}")
+        log.trace(lambda: f"[{self}] battery: {info}")
         return info
 
     async def query_num_moves(self) -> int:
         steps = struct.unpack(">I", (await self.rw_handler.send_rw_command(bytes([cmd.CMD_GET_ALL_STEP])))[1:5])[0]
-        log.LOGGER.log(logging.DEBUG, f"[{self}] #moves: {steps}")
+        log.trace(lambda: f"[{self}] #moves: {steps}")
         return steps
 
+    async def query_clock(self) -> int:
+        clk = struct.unpack(">I", (await self.rw_handler.send_rw_command(bytes([cmd.CMD_GET_CLOCK])))[1:5])[0]
+        log.trace(lambda: f"[{self}] clock: {clk}")
+        return clk
+
     def __str__(self): return str(self.ble_device)
@@ -0,0 +1,94 @@
+import typing
+from . import state, move_handler
+
+class PieceState:
+    engine: "StateEngine"
+
+    corner_perm: bytes  #home index of the cubelet at each corner position [0;7]
+    corner_ori: bytes   #twist of the cubelet at each corner position [0;2], 0 if solved
+    edge_perm: bytes    #home index of the cubelet at each edge position [0;11] (empty if the cube has no edges)
+    edge_ori: bytes     #flip of the cubelet at each edge position [0;1], 0 if solved
+
+    def __init__(self, engine: "StateEngine", corner_perm: bytes, corner_ori: bytes, edge_perm: bytes = b"", edge_ori: bytes = b""):
+        self.engine = engine
+        self.corner_perm, self.corner_ori = corner_perm, corner_ori
+        self.edge_perm, self.edge_ori = edge_perm, edge_ori
+
+    def apply_move(self, move: move_handler.Move):
+        cp, co, ep, eo = self.engine.move_tables[move]
+        perm, ori = self.corner_perm, self.corner_ori
+        self.corner_perm = bytes(perm[i] for i in cp)
+        self.corner_ori = bytes((ori[i] + o) % 3 for i, o in zip(cp, co))
+
+        if not ep: return
+        perm, ori = self.edge_perm, self.edge_ori
+        self.edge_perm = bytes(perm[i] for i in ep)
+        self.edge_ori = bytes(ori[i] ^ o for i, o in zip(ep, eo))
+
+    @property
+    def is_solved(self) -> bool:
+        solved = self.engine.solved
+        return self.corner_perm == solved.corner_perm and self.corner_ori == solved.corner_ori and self.edge_perm == solved.edge_perm and self.edge_ori == solved.edge_ori
+
+    def encode_state(self) -> bytes:
+        #Edges of cubes without edges are encoded as solved
+        edge_perm = self.edge_perm or bytes(range(12))
+        edge_ori = self.edge_ori or bytes(12)
+
+        nibbles = [p + 1 for p in self.corner_perm] + [state.CORNER_TWISTS[pi].index(t) for pi, t in enumerate(self.corner_ori)] + [p + 1 for p in edge_perm]
+        flips = sum(f << (15 - pi) for pi, f in enumerate(edge_ori))
+        return bytes((nibbles[2*i] << 4) | nibbles[2*i + 1] for i in range(14)) + flips.to_bytes(2, "big")
+
+    def to_cube_state(self) -> state.CubeState: return state.CubeState.decode_state(self.encode_state())
+
+    #PieceStates are mutable (apply_move works in place, like CubeState.apply_move), so they aren't hashable
+    def __eq__(self, other): return isinstance(other, PieceState) and (self.corner_perm, self.corner_ori, self.edge_perm, self.edge_ori) == (other.corner_perm, other.corner_ori, other.edge_perm, other.edge_ori)
+
+    def __str__(self):
+        #Only output the facelets of pieces the cube actually has
+        st = self.to_cube_state()
+        return " ".join(
+            "".join(c.get_face_color(f).value for x, y, z, c in st if f.is_on_face(x, y, z) and (self.engine.num_edges > 0 or 1 not in (x, y, z)))
+        for f in state.Face)
+
+class StateEngine:
+    cube_type: int
+    num_edges: int
+
+    solved: PieceState
+    move_tables: typing.Dict[move_handler.Move, typing.Tuple[bytes, bytes, bytes, bytes]]
+
+    def __init__(self, cube_type: int, has_edges: bool):
+        self.cube_type = cube_type
+        self.num_edges = len(state.EDGE_POSITIONS) if has_edges else 0
+        self.solved = self.decode_state(state.CubeState().encode_state())
+
+        #Precompute the permutation / orientation change of every move from the 3x3x3 geometry
+        self.move_tables = {}
+        for m in move_handler.Move:
+            st = state.CubeState()
+            st.apply_move(m)
+            p = self.decode_state(st.encode_state())
+            self.move_tables[m] = (p.corner_perm, p.corner_ori, p.edge_perm, p.edge_ori)
+
+    def is_valid_state(self, bts: bytes) -> bool: return state.CubeState.is_valid_state(bts, self.num_edges > 0)
+
+    def decode_state(self, bts: bytes) -> PieceState:
+        #Cubelet based CubeStates (e.g. for the viewer) are only built on demand, using PieceState.to_cube_state
+        nibbles = [n for b in bts[0:14] for n in state.NIBBLES[b]]
+        corner_perm = bytes(n - 1 for n in nibbles[0:8])
+        corner_ori = bytes(state.CORNER_TWISTS[pi][n] for pi, n in enumerate(nibbles[8:16]))
+        if not self.num_edges: return PieceState(self, corner_perm, corner_ori)
+
+        edge_perm = bytes(n - 1 for n in nibbles[16:28])
+        edge_ori = bytes((bts[14 + pi//8] >> (7 - (pi%8))) & 1 for pi in range(12))
+        return PieceState(self, corner_perm, corner_ori, edge_perm, edge_ori)
+
+ENGINES = {
+    2: StateEngine(2, False),
+    3: StateEngine(3, True)
+}
+
+def get_engine(cube_type: int) -> StateEngine:
+    if cube_type not in ENGINES: raise ValueError(f"Unsupported cube type {cube_type}")
+    return ENGINES[cube_type]
@@ -0,0 +1,71 @@
+import asyncio, logging, typing, time, dataclasses
+from . import log, move_handler, engine
+from .cube import CubeDevice
+
+@dataclasses.dataclass
+class BroadcastResult:
+    cube: CubeDevice
+    response: typing.Optional[bytes]
+    error: typing.Optional[BaseException]   #error of the operation, or of its verification if there is a response
+    verified: typing.Optional[bool]     #None if there was nothing to verify
+    time: int                           #round trip time of the operation [ns]
+
+    @property
+    def ok(self) -> bool: return self.error == None and self.verified != False
+
+    def __str__(self):
+        if self.response == None: return f"{self.cube}: failed ({self.error!r})"
+        return f"{self.cube}: {self.response.hex()}{' unverified' if self.verified == False else ''}{f' ({self.error!r})' if self.error != None else ''} ({self.time / 1e6:.1f}ms)"
+
+async def broadcast(
+    cubes: typing.Iterable[CubeDevice], op: typing.Callable[[CubeDevice], typing.Awaitable[bytes]],
+    max_in_flight: int = 16, timeout: float = 5.0,
+    verify: typing.Optional[typing.Callable[[CubeDevice, bytes], typing.Awaitable[bool]]] = None
+) -> typing.List[BroadcastResult]:
+    sem = asyncio.Semaphore(max_in_flight)
+
+    async def run(cube: CubeDevice) -> BroadcastResult:
+        async with sem:
+            t = time.perf_counter_ns()
+            try: resp = await asyncio.wait_for(op(cube), timeout)
+            except Exception as e:
+                log.trace(lambda: f"[{cube}] broadcast failed: {e!r}", logging.WARNING)
+                return BroadcastResult(cube, None, e, None, time.perf_counter_ns() - t)
+            t = time.perf_counter_ns() - t
+
+        #Verify the outcome (outside of the in-flight limit), treating a timeout or error as a failed verification
+        verified = error = None
+        if verify:
+            try: verified = await asyncio.wait_for(verify(cube, resp), timeout)
+            except asyncio.TimeoutError: verified = False
+            except Exception as e: verified, error = False, e
+            if not verified: log.trace(lambda: f"[{cube}] broadcast verification failed{f': {error!r}' if error else ''}", logging.WARNING)
+
+        return BroadcastResult(cube, resp, error, verified, t)
+
+    #Run the operation on all cubes concurrently, with at most max_in_flight operations pending at once
+    return await asyncio.gather(*(run(cube) for cube in cubes))
+
+async def broadcast_command(cubes: typing.Iterable[CubeDevice], req: bytes, **kwargs) -> typing.List[BroadcastResult]:
+    return await broadcast(cubes, lambda cube: cube.rw_handler.send_rw_command(req), **kwargs)
+
+async def wait_for_solved(cube: CubeDevice, resp: bytes) -> bool:
+    #Wait for a solved state notification which arrived after the response resp (e.g. to a reset), ignoring older states
+    #This relies on the cube sending a state notification after the command; if it doesn't, verification times out
+    since = cube.rw_handler.resp_times[resp[0]]
+    def is_fresh_solved() -> bool:
+        mh = cube.move_handler
+        return mh.cur_state_time != None and mh.cur_state_time > since and mh.cur_state.is_solved
+
+    solved_evt = asyncio.Event()
+    def move_cb(st: engine.PieceState, move: move_handler.Move):
+        if is_fresh_solved(): solved_evt.set()
+
+    await cube.move_handler.register_handler(move_cb)
+    try:
+        if not is_fresh_solved(): await solved_evt.wait()
+    finally: await cube.move_handler.unregister_handler(move_cb)
+    return True
+
+async def reset_cubes(cubes: typing.Iterable[CubeDevice], with_color: bool = False, **kwargs) -> typing.List[BroadcastResult]:
+    return await broadcast(cubes, lambda cube: cube.reset(with_color), verify=wait_for_solved, **kwargs)
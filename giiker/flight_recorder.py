@@ -0,0 +1,30 @@
+import logging, typing, time, enum, collections
+from . import log
+
+class FlightRecorder:
+    class Kind(enum.Enum):
+        MOVE = "move"
+        REQ = "req "
+        RESP = "resp"
+
+    _entries: typing.Deque[typing.Tuple[int, Kind, bytes]]
+
+    def __init__(self, size: int = 256):
+        self._entries = collections.deque(maxlen=size)
+
+    def record(self, kind: Kind, data: bytes, t: typing.Optional[int] = None):
+        self._entries.append((t if t != None else time.perf_counter_ns(), kind, data))
+
+    @property
+    def entries(self) -> typing.List[typing.Tuple[int, Kind, bytes]]: return list(self._entries)
+
+    def dump(self) -> str:
+        entries = self.entries
+        if not entries: return "<no recorded packets>"
+
+        #Output timestamps relative to the latest entry
+        t_end = entries[-1][0]
+        return "\n".join(f"{(t - t_end) / 1e6:+10.3f}ms {kind.value} | {data.hex()}" for t, kind, data in entries)
+
+    def dump_to_log(self, reason: str, level: int = logging.ERROR):
+        log.trace(lambda: f"{reason}, last {len(self._entries)} packets:\n{self.dump()}", level)
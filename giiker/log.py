@@ -1,3 +1,7 @@
-import logging
+import logging, typing
 
-LOGGER = logging.getLogger("GiiKER")
\ No newline at end of file
+LOGGER = logging.getLogger("GiiKER")
+
+def trace(msg: typing.Callable[[], str], level: int = logging.DEBUG):
+    #Only format the message if it is actually going to be emitted
+    if LOGGER.isEnabledFor(level): LOGGER.log(level, msg())
\ No newline at end of file
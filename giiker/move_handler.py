@@ -1,5 +1,5 @@
-import asyncio, logging, typing, bleak, uuid, enum, math
-from . import log, state
+import asyncio, logging, typing, bleak, uuid, enum, math, time, re
+from . import log, state, flight_recorder
 
 class Move(enum.Enum):
     Fr = 0x23
@@ -42,44 +42,67 @@ class Move(enum.Enum):
         dx, dy, dz = self.face.direction
         s = -1 if (self.is_ccw ^ (dx < 0 or dy < 0 or dz < 0)) else +1
         if dx != 0:
-            return [
+            mat = [
                 [ 1,  0,  0],
                 [ 0,  0, -s],
                 [ 0, +s,  0]
             ]
         elif dy != 0:
-            return [
+            mat = [
                 [ 0,  0, +s],
                 [ 0,  1,  0],
                 [ -s, 0,  0]
             ]
         elif dz != 0:
-            return [
+            mat = [
                 [ 0, -s,  0],
                 [ +s, 0,  0],
                 [ 0,  0,  1]
             ]
         else: assert False
 
+        #Double turns apply the quarter turn twice
+        if self.is_double_rot: mat = [[sum(mat[i][k] * mat[k][j] for k in range(3)) for j in range(3)] for i in range(3)]
+        return mat
+
     def __str__(self): return self.name.replace('r', '\'')
 
+MOVE_VALUES = frozenset(m.value for m in Move)
+
+def parse_moves(s: str) -> typing.List[Move]:
+    #Parses standard face turn notation, e.g. "R U R' U'" or "F2 B2'"
+    moves = []
+    for tok in s.split():
+        m = re.fullmatch(r"([FBRLUD])('?)(2?)('?)", tok)
+        if not m: raise ValueError(f"Unsupported move '{tok}'")
+        moves.append(Move[m.group(1) + ('r' if m.group(2) or m.group(4) else '') + m.group(3)])
+    return moves
+
 class MoveHandler:
     BLE_CHARACT = uuid.UUID("0000aadc-0000-1000-8000-00805f9b34fb")
 
     cube: 'CubeDevice'
-    cur_state: state.CubeState
+    cur_state: 'PieceState'
+    cur_state_time: int
+    cur_state_raw: bytes
+    num_invalid_packets: int
 
     _lock: asyncio.Lock()
-    _handlers: typing.List[typing.Callable[[state.CubeState, Move], None]]
+    _handlers: typing.List[typing.Callable[['PieceState', Move], None]]
 
     def __init__(self, cube: 'CubeDevice'):
         self.cube = cube
         self.cur_state = None
+        self.cur_state_time = None
+        self.cur_state_raw = None
+        self.num_invalid_packets = 0
 
         self._lock = asyncio.Lock()
         self._handlers = []
 
     async def connect(self):
+        if not self.cube.state_engine: raise ValueError(f"Unsupported cube type {self.cube.cube_type}")
+
         #Register move callback
         state_evt = asyncio.Event()
         def move_cb(st, mv): state_evt.set()
@@ -92,19 +115,39 @@ class MoveHandler:
         await state_evt.wait()
         await self.unregister_handler(move_cb)
 
-    async def register_handler(self, cb: typing.Callable[[state.CubeState, Move], None]):
+    async def register_handler(self, cb: typing.Callable[['PieceState', Move], None]):
         async with self._lock: self._handlers.append(cb)
 
-    async def unregister_handler(self, cb: typing.Callable[[state.CubeState, Move], None]):
+    async def unregister_handler(self, cb: typing.Callable[['PieceState', Move], None]):
         async with self._lock: self._handlers.remove(cb)
 
+    @property
+    def cur_state_cube_time(self) -> typing.Optional[float]:
+        #Arrival time of the current state on the cube clock [ms] (not a cube side timestamp of the move)
+        if self.cur_state_time == None or not self.cube.clock_sync.is_synced: return None
+        return self.cube.clock_sync.host_to_cube(self.cur_state_time)
+
     async def _recv_cb(self, charact: bleak.BleakGATTCharacteristic, resp: bytes):
+        #Timestamp the notification before doing anything else
+        recv_time = time.perf_counter_ns()
+        self.cube.flight_recorder.record(flight_recorder.FlightRecorder.Kind.MOVE, resp, recv_time)
+
+        #Drop corrupted notifications
+        if len(resp) < 17 or resp[16] not in MOVE_VALUES or not self.cube.state_engine.is_valid_state(resp[0:16]):
+            self.num_invalid_packets += 1
+            log.trace(lambda: f"[{self.cube}] Dropped invalid move notification {resp.hex()} ({self.num_invalid_packets} so far)", logging.WARNING)
+            return
+
         #Decode cube state
-        st = state.CubeState.decode_state(resp[0:16])
-        move = Move(resp[16])
-        log.LOGGER.log(logging.DEBUG, f"[{self.cube}] move | {resp.hex()} {move:3s} -> {st}")
+        try:
+            st = self.cube.state_engine.decode_state(resp[0:16])
+            move = Move(resp[16])
+        except Exception:
+            self.cube.flight_recorder.dump_to_log(f"[{self.cube}] Failed to decode move notification {resp.hex()}")
+            raise
+        log.trace(lambda: f"[{self.cube}] move | {resp.hex()} {move:3s} -> {st}")
 
         #Invoke handlers
         async with self._lock: 
-            self.cur_state = st
+            self.cur_state, self.cur_state_time, self.cur_state_raw = st, recv_time, bytes(resp[0:16])
             for h in self._handlers: h(st, move)
\ No newline at end of file
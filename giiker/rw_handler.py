@@ -1,17 +1,19 @@
-import asyncio, logging, typing, bleak, uuid
-from . import log, cmd
+import asyncio, logging, typing, bleak, uuid, time
+from . import log, cmd, flight_recorder
 
 class RWHandler:
     BLE_CHARACT_REQ = uuid.UUID("0000aaac-0000-1000-8000-00805f9b34fb")
     BLE_CHARACT_RESP = uuid.UUID("0000aaab-0000-1000-8000-00805f9b34fb")
 
     cube: 'CubeDevice'
+    resp_times: typing.Dict[int, int]   #perf_counter_ns arrival timestamp of the latest response to each command
 
     _rw_cmd_lock: asyncio.Lock
     _recv_queue: typing.Mapping[int, asyncio.Queue[asyncio.Future]]
 
     def __init__(self, cube: 'CubeDevice'):
         self.cube = cube
+        self.resp_times = {}
 
         #Setup receive queues
         self._rw_cmd_lock = asyncio.Lock()
@@ -25,24 +27,34 @@ class RWHandler:
         fut = asyncio.Future()
         async with self._rw_cmd_lock:
             cmd = req[0]
-            log.LOGGER.log(logging.DEBUG, f"[{self.cube}] req  -> {req.hex()}")
+            log.trace(lambda: f"[{self.cube}] req  -> {req.hex()}")
 
             #Queue us for response handling, and send the request
+            self.cube.flight_recorder.record(flight_recorder.FlightRecorder.Kind.REQ, req)
             await self._recv_queue[cmd].put(fut)
-            await self.cube.ble_client.write_gatt_char(RWHandler.BLE_CHARACT_REQ, req)
+            try: await self.cube.ble_client.write_gatt_char(RWHandler.BLE_CHARACT_REQ, req)
+            except Exception:
+                self.cube.flight_recorder.dump_to_log(f"[{self.cube}] Failed to send request {req.hex()}")
+                raise
 
         return await fut
 
     async def _resp_cb(self, charact: bleak.BleakGATTCharacteristic, resp: bytes):
+        #Timestamp the response like move notifications, so that the two can be ordered by arrival
+        recv_time = time.perf_counter_ns()
+        self.cube.flight_recorder.record(flight_recorder.FlightRecorder.Kind.RESP, resp, recv_time)
         async with self._rw_cmd_lock:
             cmd = resp[0]
             if cmd not in self._recv_queue:
-                log.LOGGER.log(logging.DEBUG, f"[{self.cube}] Received unexpected response for command 0x{cmd:x}: {resp.hex()}")
+                log.trace(lambda: f"[{self.cube}] Received unexpected response for command 0x{cmd:x}: {resp.hex()}")
                 return
+            self.resp_times[cmd] = recv_time
 
-            if self._recv_queue[cmd].empty(): return
+            #Complete the oldest future still waiting (requests which timed out are cancelled)
+            while not self._recv_queue[cmd].empty():
+                fut : asyncio.Future[bytes] = await self._recv_queue[cmd].get()
+                if fut.done(): continue
 
-            #Complete the future
-            log.LOGGER.log(logging.DEBUG, f"[{self.cube}] resp <- {resp.hex()}")
-            fut : asyncio.Future[bytes] = await self._recv_queue[cmd].get()
-            fut.set_result(resp)
\ No newline at end of file
+                log.trace(lambda: f"[{self.cube}] resp <- {resp.hex()}")
+                fut.set_result(resp)
+                break
\ No newline at end of file
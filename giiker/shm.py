@@ -0,0 +1,171 @@
+import asyncio, logging, typing, struct, threading
+from multiprocessing import shared_memory, resource_tracker
+from . import log, move_handler, engine, clock
+
+#header: sequence number of the latest event | capacity | cube type
+#slot: sequence number | timestamp | raw state | move (0 if none)
+_HEADER = struct.Struct("<QIB3x")
+_SLOT = struct.Struct("<QQ16sB7x")
+_SEQ = struct.Struct("<Q")
+
+_TRACKER_PATCH_LOCK = threading.Lock()
+
+def _attach_untracked(name: str) -> shared_memory.SharedMemory:
+    #Attach to an existing segment without registering it with the resource tracker, which would unlink it once we exit
+    try: return shared_memory.SharedMemory(name, track=False)
+    except TypeError: pass
+
+    #Python < 3.13 always registers attached segments. Unregistering them afterwards would also drop the registration
+    #of a publisher sharing the same tracker (same process / spawned children), so suppress the registration instead.
+    #The patch is process wide: it only swallows this thread's registration, and forwards the ones of other threads.
+    #TODO: drop this workaround (and use track=False only) once Python >= 3.13 is required
+    with _TRACKER_PATCH_LOCK:
+        register, ident = resource_tracker.register, threading.get_ident()
+        def register_others(name: str, rtype: str):
+            if threading.get_ident() != ident: register(name, rtype)
+
+        resource_tracker.register = register_others
+        try: return shared_memory.SharedMemory(name)
+        finally: resource_tracker.register = register
+
+class EventPublisher:
+    move_handler: move_handler.MoveHandler
+    capacity: int
+
+    _shm: shared_memory.SharedMemory
+    _seq: int
+
+    def __init__(self, move_handler: move_handler.MoveHandler, name: typing.Optional[str] = None, capacity: int = 1024):
+        self.move_handler = move_handler
+        self.capacity = capacity
+
+        #Create the shared memory ring buffer
+        self._shm = shared_memory.SharedMemory(name, create=True, size=_HEADER.size + capacity * _SLOT.size)
+        self._seq = 0
+        _HEADER.pack_into(self._shm.buf, 0, 0, capacity, move_handler.cube.cube_type)
+
+    @property
+    def name(self) -> str: return self._shm.name
+
+    async def attach(self):
+        #Publish the current state, so that subscribers have an initial state
+        if self.move_handler.cur_state != None: self.publish(self.move_handler.cur_state_time, self.move_handler.cur_state_raw, None)
+        await self.move_handler.register_handler(self._move_cb)
+
+    async def detach(self): await self.move_handler.unregister_handler(self._move_cb)
+
+    def close(self):
+        self._shm.close()
+        self._shm.unlink()
+
+    def publish(self, t: int, raw: bytes, move: typing.Optional[move_handler.Move]):
+        #Single producer: invalidate the slot, fill it in, then publish its sequence number
+        seq = self._seq + 1
+        off = _HEADER.size + (seq % self.capacity) * _SLOT.size
+        buf = self._shm.buf
+
+        _SEQ.pack_into(buf, off, 0)
+        _SLOT.pack_into(buf, off, 0, t, bytes(raw), move.value if move else 0)
+        _SEQ.pack_into(buf, off, seq)
+        _SEQ.pack_into(buf, 0, seq)
+        self._seq = seq
+
+    def _move_cb(self, st: engine.PieceState, move: move_handler.Move):
+        self.publish(self.move_handler.cur_state_time, self.move_handler.cur_state_raw, move)
+
+class SubscriberCube:
+    #Stands in for the CubeDevice of an event subscriber; the cube can't be queried, so its clock is never synced
+    name: str
+    cube_type: int
+    clock_sync: clock.ClockSync
+
+    def __init__(self, name: str, cube_type: int):
+        self.name, self.cube_type = name, cube_type
+        self.clock_sync = clock.ClockSync(self)
+
+    def __str__(self): return f"shm:{self.name}"
+
+class EventSubscriber:
+    cube: SubscriberCube
+    cur_state: engine.PieceState
+    cur_state_time: int
+    cur_state_raw: bytes
+
+    capacity: int
+    state_engine: engine.StateEngine
+    num_dropped: int
+
+    _shm: shared_memory.SharedMemory
+    _next_seq: int
+
+    _lock: asyncio.Lock
+    _handlers: typing.List[typing.Callable[[engine.PieceState, move_handler.Move], None]]
+
+    def __init__(self, name: str):
+        self.cur_state = self.cur_state_time = self.cur_state_raw = None
+        self.num_dropped = 0
+
+        #Attach to the ring buffer, which stays owned by the publisher
+        self._shm = _attach_untracked(name)
+
+        #Start at the latest event
+        head, self.capacity, cube_type = _HEADER.unpack_from(self._shm.buf, 0)
+        self.cube = SubscriberCube(name, cube_type)
+        self.state_engine = engine.get_engine(cube_type)
+        self._next_seq = max(head, 1)
+        events = self._read_events() if head > 0 else []
+        if events: self.cur_state, self.cur_state_time, self.cur_state_raw, _ = events[-1]
+
+        self._lock = asyncio.Lock()
+        self._handlers = []
+
+    def close(self): self._shm.close()
+
+    async def register_handler(self, cb: typing.Callable[[engine.PieceState, move_handler.Move], None]):
+        async with self._lock: self._handlers.append(cb)
+
+    async def unregister_handler(self, cb: typing.Callable[[engine.PieceState, move_handler.Move], None]):
+        async with self._lock: self._handlers.remove(cb)
+
+    async def run(self, poll_interval: float = 0.0005):
+        while True:
+            await self.poll()
+            await asyncio.sleep(poll_interval)
+
+    async def poll(self):
+        events = self._read_events()
+        if not events: return
+
+        #Update the current state and invoke handlers event by event, so that handlers see each event's own timestamp
+        async with self._lock:
+            for st, t, raw, move in events:
+                self.cur_state, self.cur_state_time, self.cur_state_raw = st, t, raw
+                if not move: continue
+                for h in self._handlers: h(st, move)
+
+    def _read_events(self) -> typing.List[typing.Tuple[engine.PieceState, int, bytes, typing.Optional[move_handler.Move]]]:
+        buf = self._shm.buf
+        head = _SEQ.unpack_from(buf, 0)[0]
+        if head < self._next_seq: return []
+        num_dropped = self.num_dropped
+
+        #Skip events which have already been overwritten
+        if head - self._next_seq >= self.capacity:
+            self.num_dropped += head - self._next_seq - self.capacity + 1
+            self._next_seq = head - self.capacity + 1
+
+        events = []
+        for seq in range(self._next_seq, head + 1):
+            off = _HEADER.size + (seq % self.capacity) * _SLOT.size
+            slot_seq, t, raw, move = _SLOT.unpack_from(buf, off)
+
+            #Discard the event if the publisher overwrote the slot while we were reading it
+            if slot_seq != seq or _SEQ.unpack_from(buf, off)[0] != seq:
+                self.num_dropped += 1
+                continue
+
+            events.append((self.state_engine.decode_state(raw), t, raw, move_handler.Move(move) if move else None))
+
+        self._next_seq = head + 1
+        if self.num_dropped != num_dropped: log.trace(lambda: f"[{self.cube}] dropped {self.num_dropped - num_dropped} events", logging.WARNING)
+        return events
@@ -84,6 +84,15 @@ class Cubelet:
     @property
     def is_corner(self): return not self.is_center and not self.is_edge
 
+CORNER_POSITIONS = [(x,y,z) for y in [0, 2] for x, z in [(0, 2), (0, 0), (2, 0), (2, 2)]]
+EDGE_POSITIONS = [(x,0,z) for x, z in [(1, 2), (0, 1), (1, 0), (2, 1)]] + [(x,1,z) for x, z in [(0, 2), (0, 0), (2, 0), (2, 2)]] + [(x,2,z) for x, z in [(1, 2), (0, 1), (1, 0), (2, 1)]]
+
+#Lookup tables for decoding / validating encoded states: the nibbles of each byte, and the twist [0;2] of each corner
+#rotation nibble per corner position (None if invalid)
+NIBBLES = [(b >> 4, b & 0xf) for b in range(256)]
+CORNER_TWISTS = [[(n % 3 if pi in (1, 3, 4, 6) else -n % 3) if 1 <= n <= 3 else None for n in range(16)] for pi in range(8)]
+_POPCOUNT = [bin(i).count("1") for i in range(1 << 13)]
+
 class CubeState:
     cubelets: typing.List[typing.List[typing.List[Cubelet]]]
 
@@ -140,6 +149,65 @@ class CubeState:
 
         return s
 
+    def encode_state(self) -> bytes:
+        nibbles = [0] * 28
+        flips = 0
+
+        #Inverse of decode_state: find the rotation which yields the cubelet's axis colors
+        for pi, (x, y, z) in enumerate(CORNER_POSITIONS):
+            cblet = self[x,y,z]
+            hx, hy, hz = cblet.home_x, cblet.home_y, cblet.home_z
+
+            hof = [f if c > 0 else f.opposite for c, f in [(hx, Face.R), (hy, Face.U), (hz, Face.F)]]
+            of = hof if (x == hx) ^ (z == hz) ^ (y == hy) else hof[::-1]
+            rof = [f if (x,y,z)[i] > 0 else f.opposite for i, f in enumerate([cblet.x_face, cblet.y_face, cblet.z_face])]
+
+            nibbles[pi] = CORNER_POSITIONS.index((hx, hy, hz)) + 1
+            nibbles[8 + pi] = next(r for r in range(1, 4) if all(rof[i] == of[(i + 3-r) % 3] for i in range(3)))
+
+        for pi, (x, y, z) in enumerate(EDGE_POSITIONS):
+            cblet = self[x,y,z]
+            hx, hy, hz = cblet.home_x, cblet.home_y, cblet.home_z
+
+            hof = [f if c > 0 else f.opposite for c, f in [(hx, Face.R), (hy, Face.U), (hz, Face.F)] if c != 1]
+            of = hof if (hx != 1) ^ (x == 1) else hof[::-1]
+            rof = [f if (x,y,z)[i] > 0 else f.opposite for i, f in enumerate([cblet.x_face, cblet.y_face, cblet.z_face]) if (x,y,z)[i] != 1]
+
+            nibbles[16 + pi] = EDGE_POSITIONS.index((hx, hy, hz)) + 1
+            if rof != of: flips |= 1 << (15 - pi)
+
+        return bytes((nibbles[2*i] << 4) | nibbles[2*i + 1] for i in range(14)) + flips.to_bytes(2, "big")
+
+    @staticmethod
+    def is_valid_state(bts: bytes, check_edges: bool = True) -> bool:
+        if len(bts) != 16 or (check_edges and (bts[15] & 0xf) != 0): return False
+        nibbles = [n for b in bts[0:14] for n in NIBBLES[b]]
+
+        #Check that corners are a permutation, with a twist sum divisible by 3 (twists run in the opposite direction for some positions)
+        seen, inversions, twist = 0, 0, 0
+        for pi in range(8):
+            c, t = nibbles[pi], CORNER_TWISTS[pi][nibbles[8 + pi]]
+            if not 1 <= c <= 8 or (seen >> c) & 1 or t == None: return False
+            inversions += _POPCOUNT[seen >> c]
+            seen |= 1 << c
+            twist += t
+
+        if twist % 3 != 0: return False
+        if not check_edges: return True
+
+        #Check that edges are a permutation, with an even number of flips
+        seen = 0
+        for pi in range(12):
+            e = nibbles[16 + pi]
+            if not 1 <= e <= 12 or (seen >> e) & 1: return False
+            inversions += _POPCOUNT[seen >> e]
+            seen |= 1 << e
+
+        if _POPCOUNT[(bts[14] << 4) | (bts[15] >> 4)] % 2 != 0: return False
+
+        #Check that corner and edge permutation parities match
+        return inversions % 2 == 0
+
     @staticmethod
     def decode_state(bts: bytes) -> "CubeState":
         def get_nibble(i) -> int: return (bts[i//2] >> (4 - 4 * (i%2))) & 0xf
@@ -148,7 +216,6 @@ class CubeState:
 
         #nibbles 0-7: index of cubelet at corner position | 1 nibble [1;8]
         #nibbles 8-15: rotation of cubelet at corner position | 1 nibble [1;3]
-        CORNER_POSITIONS = [(x,y,z) for y in [0, 2] for x, z in [(0, 2), (0, 0), (2, 0), (2, 2)]]
         for pi in range(len(CORNER_POSITIONS)):
             x, y, z = CORNER_POSITIONS[pi]
             hx, hy, hz = CORNER_POSITIONS[get_nibble(pi) - 1]
@@ -162,7 +229,6 @@ class CubeState:
 
         #nibbles 16-27: index of cubelet at edge position | 1 nibble [1;12]
         #nibbles 28-30: rotation of cublet at edge position | 1 bit
-        EDGE_POSITIONS = [(x,0,z) for x, z in [(1, 2), (0, 1), (1, 0), (2, 1)]] + [(x,1,z) for x, z in [(0, 2), (0, 0), (2, 0), (2, 2)]] + [(x,2,z) for x, z in [(1, 2), (0, 1), (1, 0), (2, 1)]]
         for pi in range(len(EDGE_POSITIONS)):
             x, y, z = EDGE_POSITIONS[pi]
             hx, hy, hz = EDGE_POSITIONS[get_nibble(16 + pi) - 1]
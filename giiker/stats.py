@@ -0,0 +1,72 @@
+import typing, collections, bisect, math
+
+class RollingAverage:
+    size: int
+    trim: int
+
+    value: typing.Optional[float]   #current average [ms], math.inf if DNF, None if there are not enough results yet
+    best: typing.Optional[float]    #best average so far [ms]
+
+    _window: typing.Deque[typing.Optional[int]]
+    _sorted: typing.List[int]
+    _sum: int
+    _num_dnfs: int
+
+    def __init__(self, size: int, trim: int):
+        self.size, self.trim = size, trim
+        self.value = self.best = None
+
+        self._window = collections.deque()
+        self._sorted = []
+        self._sum = self._num_dnfs = 0
+
+    def add(self, result: typing.Optional[int]):
+        #Push the new result into the window, keeping finite results sorted
+        self._window.append(result)
+        if result == None: self._num_dnfs += 1
+        else:
+            bisect.insort(self._sorted, result)
+            self._sum += result
+
+        #Drop the oldest result
+        if len(self._window) > self.size:
+            old = self._window.popleft()
+            if old == None: self._num_dnfs -= 1
+            else:
+                del self._sorted[bisect.bisect_left(self._sorted, old)]
+                self._sum -= old
+
+        if len(self._window) < self.size: return
+
+        #Calculate the trimmed mean, DNFs counting as the worst results
+        if self._num_dnfs > self.trim: self.value = math.inf
+        else:
+            num_worst = self.trim - self._num_dnfs
+            trimmed = self._sum - sum(self._sorted[:self.trim]) - sum(self._sorted[len(self._sorted)-num_worst:] if num_worst > 0 else [])
+            self.value = trimmed / (self.size - 2*self.trim)
+
+        if self.best == None or self.value < self.best: self.best = self.value
+
+class SolveStats:
+    AVERAGES = { 5: 1, 12: 1, 100: 5 }
+
+    count: int
+    best: typing.Optional[int]
+    averages: typing.Mapping[int, RollingAverage]
+
+    def __init__(self):
+        self.count = 0
+        self.best = None
+        self.averages = { size: RollingAverage(size, trim) for size, trim in SolveStats.AVERAGES.items() }
+
+    def add(self, result: typing.Optional[int]):
+        self.count += 1
+        if result != None and (self.best == None or result < self.best): self.best = result
+        for avg in self.averages.values(): avg.add(result)
+
+    @property
+    def ao5(self) -> RollingAverage: return self.averages[5]
+    @property
+    def ao12(self) -> RollingAverage: return self.averages[12]
+    @property
+    def ao100(self) -> RollingAverage: return self.averages[100]
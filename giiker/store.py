@@ -0,0 +1,61 @@
+import typing, sqlite3, time
+from . import stats
+
+class SolveStore:
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS solves (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cube_uid TEXT NOT NULL,
+            session TEXT NOT NULL,
+            recorded_at REAL NOT NULL,
+            time_ms INTEGER NOT NULL,
+            result_ms INTEGER,
+            inspection_ms INTEGER,
+            penalty INTEGER NOT NULL,
+            num_moves INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS solves_cube_uid ON solves (cube_uid, id);
+        CREATE INDEX IF NOT EXISTS solves_session ON solves (session, id);
+    """
+
+    db: sqlite3.Connection
+
+    _stats: typing.Dict[typing.Tuple[typing.Optional[str], typing.Optional[str]], stats.SolveStats]
+
+    def __init__(self, path: str):
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SolveStore.SCHEMA)
+        self._stats = {}
+
+    def close(self): self.db.close()
+
+    def add_solve(self, cube_uid: str, session: str, solve: 'Solve') -> int:
+        with self.db:
+            cur = self.db.execute(
+                "INSERT INTO solves (cube_uid, session, recorded_at, time_ms, result_ms, inspection_ms, penalty, num_moves) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (cube_uid, session, time.time(), solve.time, solve.result, solve.inspection_time // 1000000 if solve.inspection_time != None else None, solve.penalty.value, solve.num_moves)
+            )
+
+        #Incrementally update all cached statistics this solve belongs to
+        for key in [(None, None), (cube_uid, None), (None, session), (cube_uid, session)]:
+            if key in self._stats: self._stats[key].add(solve.result)
+
+        return cur.lastrowid
+
+    def results(self, cube_uid: typing.Optional[str] = None, session: typing.Optional[str] = None) -> typing.Iterator[typing.Optional[int]]:
+        conds, params = [], []
+        if cube_uid != None: conds, params = conds + ["cube_uid = ?"], params + [cube_uid]
+        if session != None: conds, params = conds + ["session = ?"], params + [session]
+
+        query = "SELECT result_ms FROM solves" + (" WHERE " + " AND ".join(conds) if conds else "") + " ORDER BY id"
+        for row in self.db.execute(query, params): yield row[0]
+
+    def stats(self, cube_uid: typing.Optional[str] = None, session: typing.Optional[str] = None) -> stats.SolveStats:
+        #Statistics are built from the history once, and then kept up to date by add_solve
+        key = (cube_uid, session)
+        if key not in self._stats:
+            st = stats.SolveStats()
+            for res in self.results(cube_uid, session): st.add(res)
+            self._stats[key] = st
+
+        return self._stats[key]
@@ -0,0 +1,131 @@
+import typing, time, enum, dataclasses
+from . import log, move_handler, store, engine
+
+class Penalty(enum.Enum):
+    NONE = 0
+    PLUS_TWO = 1
+    DNF = 2
+
+@dataclasses.dataclass
+class Solve:
+    start_time: int                         #[ns] timestamp of the first move (perf_counter_ns, or the cube clock if the timer uses it)
+    end_time: int                           #[ns] timestamp of the solving move
+    num_moves: int
+    inspection_time: typing.Optional[int]   #[ns], None if inspection was disabled
+    penalty: Penalty
+
+    @property
+    def time(self) -> int: return (self.end_time - self.start_time) // 1000000
+
+    @property
+    def result(self) -> typing.Optional[int]:
+        if self.penalty == Penalty.DNF: return None
+        return self.time + (2000 if self.penalty == Penalty.PLUS_TWO else 0)
+
+    def __str__(self):
+        if self.result == None: return "DNF"
+        return format_time(self.result) + (" (+2)" if self.penalty == Penalty.PLUS_TWO else "")
+
+def format_time(t: typing.Optional[float]) -> str:
+    if t == None: return "-"
+    if t == float("inf"): return "DNF"
+    return f"{int(t // 60000)}m {int(t // 1000 % 60):02d}s {int(t % 1000):03d}ms"
+
+class SolveTimer:
+    INSPECTION_TIME = 15000000000
+
+    class State(enum.Enum):
+        IDLE = enum.auto()
+        INSPECTING = enum.auto()
+        READY = enum.auto()
+        RUNNING = enum.auto()
+
+    move_handler: move_handler.MoveHandler
+    inspection: bool
+    use_cube_clock: bool
+
+    store: typing.Optional[store.SolveStore]
+    cube_uid: str
+    session: str
+
+    state: State
+    start_time: int
+    num_moves: int
+
+    _arm_time: int
+    _on_cube_clock: bool
+    _handlers: typing.List[typing.Callable[[Solve], None]]
+
+    def __init__(self, move_handler: move_handler.MoveHandler, inspection: bool = False, store: typing.Optional[store.SolveStore] = None, cube_uid: str = "", session: typing.Optional[str] = None, use_cube_clock: bool = False):
+        self.move_handler = move_handler
+        self.inspection = inspection
+        self.use_cube_clock = use_cube_clock
+
+        self.store = store
+        self.cube_uid = cube_uid
+        self.session = session if session != None else time.strftime("%Y-%m-%d %H:%M:%S")
+
+        self.state = SolveTimer.State.IDLE
+        self.start_time = self._arm_time = None
+        self.num_moves = 0
+        self._on_cube_clock = False
+
+        self._handlers = []
+
+    async def attach(self): await self.move_handler.register_handler(self._move_cb)
+    async def detach(self): await self.move_handler.unregister_handler(self._move_cb)
+
+    def register_handler(self, cb: typing.Callable[[Solve], None]): self._handlers.append(cb)
+    def unregister_handler(self, cb: typing.Callable[[Solve], None]): self._handlers.remove(cb)
+
+    def arm(self):
+        #Starts inspection (if enabled); the timer itself starts with the first move
+        #The clock is picked once per solve, so that start and end times are always taken from the same clock
+        self._on_cube_clock = self.use_cube_clock and self.move_handler.cube.clock_sync.is_synced
+        self._arm_time = self._timestamp(time.perf_counter_ns())
+        self.state = SolveTimer.State.INSPECTING if self.inspection else SolveTimer.State.READY
+        log.trace(lambda: f"[{self.move_handler.cube}] timer armed")
+
+    def cancel(self):
+        self.state = SolveTimer.State.IDLE
+        self.start_time = self._arm_time = None
+
+    @property
+    def elapsed(self) -> typing.Optional[int]:
+        if self.state == SolveTimer.State.INSPECTING: return (self._timestamp(time.perf_counter_ns()) - self._arm_time) // 1000000
+        if self.state == SolveTimer.State.RUNNING: return (self._timestamp(time.perf_counter_ns()) - self.start_time) // 1000000
+        return None
+
+    def _timestamp(self, host_time: int) -> int:
+        #Maps a host timestamp onto the cube clock [ns], correcting for drift between the two clocks
+        #This does not improve on the arrival time accuracy of move notifications, which carry no cube timestamp
+        if not self._on_cube_clock: return host_time
+        return int(self.move_handler.cube.clock_sync.host_to_cube(host_time) * 1000000)
+
+    def _move_cb(self, st: engine.PieceState, move: move_handler.Move):
+        t = self._timestamp(self.move_handler.cur_state_time)
+
+        #Handle start condition
+        if self.state in (SolveTimer.State.INSPECTING, SolveTimer.State.READY):
+            self.state = SolveTimer.State.RUNNING
+            self.start_time, self.num_moves = t, 0
+
+        if self.state != SolveTimer.State.RUNNING: return
+        self.num_moves += 1
+
+        #Handle solve condition
+        if not st.is_solved: return
+
+        inspection_time = penalty = None
+        if self.inspection:
+            inspection_time = self.start_time - self._arm_time
+            if inspection_time > SolveTimer.INSPECTION_TIME + 2000000000: penalty = Penalty.DNF
+            elif inspection_time > SolveTimer.INSPECTION_TIME: penalty = Penalty.PLUS_TWO
+
+        solve = Solve(self.start_time, t, self.num_moves, inspection_time, penalty or Penalty.NONE)
+        self.cancel()
+        log.trace(lambda: f"[{self.move_handler.cube}] solve: {solve}")
+
+        #Persist the solve and invoke handlers
+        if self.store: self.store.add_solve(self.cube_uid, self.session, solve)
+        for h in self._handlers: h(solve)
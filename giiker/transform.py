@@ -0,0 +1,94 @@
+import typing, functools
+from . import state, move_handler
+
+_POSITIONS = [(x, y, z) for x in range(3) for y in range(3) for z in range(3)]
+_CENTERS = frozenset(i for i, p in enumerate(_POSITIONS) if p.count(1) >= 2)
+_IDENTITY_MAT = (1, 0, 0, 0, 1, 0, 0, 0, 1)
+_OPPOSITES = { f: f.opposite for f in state.Face }
+
+def _mat_mul(a: typing.Tuple[int, ...], b: typing.Tuple[int, ...]) -> typing.Tuple[int, ...]:
+    return tuple(sum(a[3*i + k] * b[3*k + j] for k in range(3)) for i in range(3) for j in range(3))
+
+def _mat_transpose(a: typing.Tuple[int, ...]) -> typing.Tuple[int, ...]: return tuple(a[3*j + i] for i in range(3) for j in range(3))
+
+class CubeTransform:
+    #For every destination position: the position the cubelet comes from, and the rotation (row vector convention, like Move.rot_matrix) applied to it
+    sources: typing.Tuple[int, ...]
+    rotations: typing.Tuple[typing.Tuple[int, ...], ...]
+
+    _moved: typing.List[typing.Tuple[typing.Tuple[int, int, int], typing.Tuple[int, int, int], typing.Tuple[typing.Tuple[int, bool], ...]]]
+
+    def __init__(self, sources: typing.Sequence[int], rotations: typing.Sequence[typing.Tuple[int, ...]]):
+        #The cube doesn't report center orientations (see CubeState.decode_state), so centers which stay in place aren't
+        #rotated. This way transforms resulting in the same reported state compare equal.
+        self.sources = tuple(sources)
+        self.rotations = tuple(_IDENTITY_MAT if dst in _CENTERS and src == dst else rot for dst, (src, rot) in enumerate(zip(self.sources, rotations)))
+
+        #Precompute which axis (and direction) every axis of a moved cubelet ends up at
+        self._moved = []
+        for dst, (src, rot) in enumerate(zip(self.sources, self.rotations)):
+            if src == dst and rot == _IDENTITY_MAT: continue
+            axes = tuple(next((j, rot[3*i + j] < 0) for j in range(3) if rot[3*i + j] != 0) for i in range(3))
+            self._moved.append((_POSITIONS[dst], _POSITIONS[src], axes))
+
+    @staticmethod
+    def from_move(move: move_handler.Move) -> "CubeTransform":
+        rot_mat = move.rot_matrix
+        rot = tuple(v for row in rot_mat for v in row)
+
+        sources, rotations = list(range(27)), [_IDENTITY_MAT] * 27
+        for src, (x, y, z) in enumerate(_POSITIONS):
+            if not move.face.is_on_face(x, y, z): continue
+            p = (x-1, y-1, z-1)
+            nx, ny, nz = (sum(rot_mat[oi][ni] * p[oi] for oi in range(3)) + 1 for ni in range(3))
+            dst = _POSITIONS.index((nx, ny, nz))
+            sources[dst], rotations[dst] = src, rot
+
+        return CubeTransform(sources, rotations)
+
+    @property
+    def is_identity(self) -> bool: return not self._moved
+
+    def apply(self, st: state.CubeState):
+        #Like CubeState.apply_move, this rotates the moved cubelets in place
+        moved = [(dst, st[src], axes) for dst, src, axes in self._moved]
+        for dst, c, axes in moved:
+            faces = (c.x_face, c.y_face, c.z_face)
+            new_faces = [None] * 3
+            for f, (ax, flip) in zip(faces, axes): new_faces[ax] = _OPPOSITES[f] if flip else f
+            c.x_face, c.y_face, c.z_face = new_faces
+            st[dst] = c
+
+    def inverse(self) -> "CubeTransform":
+        sources, rotations = [0] * 27, [None] * 27
+        for dst, (src, rot) in enumerate(zip(self.sources, self.rotations)):
+            sources[src], rotations[src] = dst, _mat_transpose(rot)
+        return CubeTransform(sources, rotations)
+
+    def __mul__(self, other: "CubeTransform") -> "CubeTransform":
+        #a * b applies a, then b
+        return CubeTransform(
+            [self.sources[other.sources[dst]] for dst in range(27)],
+            [_mat_mul(self.rotations[other.sources[dst]], other.rotations[dst]) for dst in range(27)]
+        )
+
+    def __pow__(self, n: int) -> "CubeTransform":
+        t, base = IDENTITY_TRANSFORM, self if n >= 0 else self.inverse()
+        for _ in range(abs(n)): t = t * base
+        return t
+
+    def __eq__(self, other): return isinstance(other, CubeTransform) and (self.sources, self.rotations) == (other.sources, other.rotations)
+    def __hash__(self): return hash((self.sources, self.rotations))
+
+IDENTITY_TRANSFORM = CubeTransform(range(27), [_IDENTITY_MAT] * 27)
+MOVE_TRANSFORMS = { m: CubeTransform.from_move(m) for m in move_handler.Move }
+
+@functools.lru_cache(maxsize=4096)
+def _compile_moves(moves: typing.Tuple[move_handler.Move, ...]) -> CubeTransform:
+    t = IDENTITY_TRANSFORM
+    for m in moves: t = t * MOVE_TRANSFORMS[m]
+    return t
+
+def compile_moves(moves: typing.Union[str, typing.Iterable[move_handler.Move]]) -> CubeTransform:
+    if isinstance(moves, str): moves = move_handler.parse_moves(moves)
+    return _compile_moves(tuple(moves))